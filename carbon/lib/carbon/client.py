@@ -17,10 +17,10 @@ class CarbonClientProtocol(Int32StringReceiver):
     self.paused = False
     self.connected = True
     self.transport.registerProducer(self, streaming=True)
-    # Define internal metric names
+    # Internal metric names are built once per destination by the factory
     self.destinationName = self.factory.destinationName
-    self.queuedUntilReady = 'destinations.%s.queuedUntilReady' % self.destinationName
-    self.sent = 'destinations.%s.sent' % self.destinationName
+    self.queuedUntilReady = self.factory.queuedUntilReady
+    self.sent = self.factory.sent
 
     self.factory.connectionMade.callback(self)
     self.factory.connectionMade = Deferred()
@@ -107,6 +107,8 @@ class CarbonClientFactory(ReconnectingClientFactory):
     self.attemptedRelays = 'destinations.%s.attemptedRelays' % self.destinationName
     self.fullQueueDrops = 'destinations.%s.fullQueueDrops' % self.destinationName
     self.queuedUntilConnected = 'destinations.%s.queuedUntilConnected' % self.destinationName
+    self.queuedUntilReady = 'destinations.%s.queuedUntilReady' % self.destinationName
+    self.sent = 'destinations.%s.sent' % self.destinationName
 
   def queueFullCallback(self, result):
     log.clients('%s send queue is full (%d datapoints)' % (self, result))
@@ -1,6 +1,7 @@
 import os
 import time
 import socket
+from array import array
 from resource import getrusage, RUSAGE_SELF
 
 from twisted.application.service import Service
@@ -10,6 +11,8 @@ from carbon.conf import settings
 
 stats = {}
 HOSTNAME = socket.gethostname().replace('.','_')
+# Full metric name prefixes, built by setupMetricPrefixes() once settings are loaded
+cachePrefix = relayPrefix = aggregatorPrefix = None
 PAGESIZE = os.sysconf('SC_PAGESIZE')
 rusage = getrusage(RUSAGE_SELF)
 lastUsage = rusage.ru_utime + rusage.ru_stime
@@ -21,17 +24,16 @@ lastUsageTime = time.time()
 
 
 def increment(stat, increase=1):
-  try:
-    stats[stat] += increase
-  except KeyError:
-    stats[stat] = increase
+  s = stats # look the dict up once so a concurrent reset can't split the update
+  s[stat] = s.get(stat, 0) + increase
 
 
 def append(stat, value):
-  try:
-    stats[stat].append(value)
-  except KeyError:
-    stats[stat] = [value]
+  s = stats # see increment()
+  samples = s.get(stat)
+  if samples is None:
+    samples = s[stat] = array('d')
+  samples.append(value)
 
 
 def getCpuUsage():
@@ -61,9 +63,9 @@ def getMemUsage():
 
 
 def recordMetrics():
-  global lastUsage
-  myStats = stats.copy()
-  stats.clear()
+  global stats
+  myStats, stats = stats, {}
+  now = time.time()
 
   # cache metrics
   if settings.program == 'carbon-cache':
@@ -77,65 +79,69 @@ def recordMetrics():
 
     if updateTimes:
       avgUpdateTime = sum(updateTimes) / len(updateTimes)
-      record('avgUpdateTime', avgUpdateTime)
+      record('avgUpdateTime', avgUpdateTime, now)
 
     if committedPoints:
       pointsPerUpdate = float(committedPoints) / len(updateTimes)
-      record('pointsPerUpdate', pointsPerUpdate)
+      record('pointsPerUpdate', pointsPerUpdate, now)
 
-    record('updateOperations', len(updateTimes))
-    record('committedPoints', committedPoints)
-    record('creates', creates)
-    record('errors', errors)
-    record('cache.queries', cacheQueries)
-    record('cache.queues', len(cache.MetricCache))
-    record('cache.size', cache.MetricCache.size)
-    record('cache.overflow', cacheOverflow)
+    record('updateOperations', len(updateTimes), now)
+    record('committedPoints', committedPoints, now)
+    record('creates', creates, now)
+    record('errors', errors, now)
+    record('cache.queries', cacheQueries, now)
+    record('cache.queues', len(cache.MetricCache), now)
+    record('cache.size', cache.MetricCache.size, now)
+    record('cache.overflow', cacheOverflow, now)
 
   # aggregator metrics
   elif settings.program == 'carbon-aggregator':
     record = aggregator_record
-    record('allocatedBuffers', len(BufferManager))
+    record('allocatedBuffers', len(BufferManager), now)
     record('bufferedDatapoints',
-           sum([b.size for b in BufferManager.buffers.values()]))
-    record('aggregateDatapointsSent', myStats.get('aggregateDatapointsSent', 0))
+           sum([b.size for b in BufferManager.buffers.values()]), now)
+    record('aggregateDatapointsSent', myStats.get('aggregateDatapointsSent', 0), now)
 
   # common metrics
-  record('metricsReceived', myStats.get('metricsReceived', 0))
-  record('cpuUsage', getCpuUsage())
+  record('metricsReceived', myStats.get('metricsReceived', 0), now)
+  record('cpuUsage', getCpuUsage(), now)
   try: # This only works on Linux
-    record('memUsage', getMemUsage())
+    record('memUsage', getMemUsage(), now)
   except:
     pass
 
 
-def cache_record(metric, value):
-    if settings.instance is None:
-      fullMetric = 'carbon.agents.%s.%s' % (HOSTNAME, metric)
-    else:
-      fullMetric = 'carbon.agents.%s-%s.%s' % (HOSTNAME, settings.instance, metric)
-    datapoint = (time.time(), value)
-    cache.MetricCache.store(fullMetric, datapoint)
+def metricPrefix(component):
+  if settings.instance is None:
+    return 'carbon.%s.%s.' % (component, HOSTNAME)
+  else:
+    return 'carbon.%s.%s-%s.' % (component, HOSTNAME, settings.instance)
 
-def relay_record(metric, value):
-    if settings.instance is None:
-      fullMetric = 'carbon.relays.%s.%s' % (HOSTNAME, metric)
-    else:
-      fullMetric = 'carbon.relays.%s-%s.%s' % (HOSTNAME, settings.instance, metric)
-    datapoint = (time.time(), value)
-    events.metricGenerated(fullMetric, datapoint)
 
-def aggregator_record(metric, value):
-    if settings.instance is None:
-      fullMetric = 'carbon.aggregator.%s.%s' % (HOSTNAME, metric)
-    else:
-      fullMetric = 'carbon.aggregator.%s-%s.%s' % (HOSTNAME, settings.instance, metric)
-    datapoint = (time.time(), value)
-    events.metricGenerated(fullMetric, datapoint)
+def setupMetricPrefixes():
+  global cachePrefix, relayPrefix, aggregatorPrefix
+  cachePrefix = metricPrefix('agents')
+  relayPrefix = metricPrefix('relays')
+  aggregatorPrefix = metricPrefix('aggregator')
+
+
+def cache_record(metric, value, timestamp):
+    datapoint = (timestamp, value)
+    cache.MetricCache.store(cachePrefix + metric, datapoint)
+
+def relay_record(metric, value, timestamp):
+    datapoint = (timestamp, value)
+    events.metricGenerated(relayPrefix + metric, datapoint)
+
+def aggregator_record(metric, value, timestamp):
+    datapoint = (timestamp, value)
+    events.metricGenerated(aggregatorPrefix + metric, datapoint)
 
 
 class InstrumentationService(Service):
     def __init__(self):
+        # settings.instance isn't known until the config has been read
+        setupMetricPrefixes()
         self.record_task = LoopingCall(recordMetrics)
 
     def startService(self):
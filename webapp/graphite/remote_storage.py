@@ -111,20 +111,54 @@ class RemoteNode:
     if not self.__isLeaf:
       return []
 
+    return self.send_fetch(startTime, endTime).get_results()
+
+
+  def send_fetch(self, startTime, endTime):
+    "Sends the fetch request without waiting for the response"
+    request = FetchRequest(self, startTime, endTime)
+    request.send()
+    return request
+
+
+  def isLeaf(self):
+    return self.__isLeaf
+
+
+
+class FetchRequest:
+  def __init__(self, node, startTime, endTime):
+    self.node = node
+    self.startTime = startTime
+    self.endTime = endTime
+    self.connection = None
+
+
+  def send(self):
     query_params = [
-      ('target', self.metric_path),
+      ('target', self.node.metric_path),
       ('pickle', 'true'),
-      ('from', str( int(startTime) )),
-      ('until', str( int(endTime) ))
+      ('from', str( int(self.startTime) )),
+      ('until', str( int(self.endTime) ))
     ]
     query_string = urlencode(query_params)
 
-    connection = HTTPConnectionWithTimeout(self.store.host)
-    connection.timeout = settings.REMOTE_STORE_FETCH_TIMEOUT
-    connection.request('GET', '/render/?' + query_string)
-    response = connection.getresponse()
-    assert response.status == 200, "Failed to retrieve remote data: %d %s" % (response.status, response.reason)
-    rawData = response.read()
+    self.connection = HTTPConnectionWithTimeout(self.node.store.host)
+    self.connection.timeout = settings.REMOTE_STORE_FETCH_TIMEOUT
+    try:
+      self.connection.request('GET', '/render/?' + query_string)
+    except:
+      self.close()
+      raise
+
+
+  def get_results(self):
+    try:
+      response = self.connection.getresponse()
+      assert response.status == 200, "Failed to retrieve remote data: %d %s" % (response.status, response.reason)
+      rawData = response.read()
+    finally:
+      self.close()
 
     seriesList = pickle.loads(rawData)
     assert len(seriesList) == 1, "Invalid result: seriesList=%s" % str(seriesList)
@@ -134,8 +168,10 @@ class RemoteNode:
     return (timeInfo, series['values'])
 
 
-  def isLeaf(self):
-    return self.__isLeaf
+  def close(self):
+    if self.connection:
+      self.connection.close()
+      self.connection = None
 
 
 
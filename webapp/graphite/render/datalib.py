@@ -18,6 +18,7 @@ import time
 from django.conf import settings
 from graphite.logger import log
 from graphite.storage import STORE, LOCAL_STORE
+from graphite.remote_storage import RemoteNode
 from graphite.render.hashing import ConsistentHashRing
 
 try:
@@ -219,24 +220,49 @@ def fetchData(requestContext, pathExpr):
   else:
     store = STORE
 
-  for dbFile in store.find(pathExpr):
-    log.metric_access(dbFile.metric_path)
-    dbResults = dbFile.fetch( timestamp(startTime), timestamp(endTime) )
-    try:
-      cachedResults = CarbonLink.query(dbFile.real_metric)
-      results = mergeResults(dbResults, cachedResults)
-    except:
-      log.exception()
-      results = dbResults
-
-    if not results:
-      continue
-
-    (timeInfo,values) = results
-    (start,end,step) = timeInfo
-    series = TimeSeries(dbFile.metric_path, start, end, step, values)
-    series.pathExpression = pathExpr #hack to pass expressions through to render functions
-    seriesList.append(series)
+  fromTime = timestamp(startTime)
+  untilTime = timestamp(endTime)
+  dbFiles = list( store.find(pathExpr) )
+
+  # Keep a window of remote fetches in flight ahead of the node being read
+  # so the remote servers work on them concurrently instead of one
+  # round-trip at a time, without opening a connection for every match
+  remoteNodes = [ n for n in dbFiles if isinstance(n, RemoteNode) and n.isLeaf() ]
+  maxRemoteFetches = max(1, settings.REMOTE_STORE_MAX_CONCURRENT_FETCHES)
+  remoteFetches = {}
+  nextRemote = 0
+
+  try:
+    for dbFile in dbFiles:
+      while nextRemote < len(remoteNodes) and len(remoteFetches) < maxRemoteFetches:
+        remoteNode = remoteNodes[nextRemote]
+        remoteFetches[remoteNode] = remoteNode.send_fetch(fromTime, untilTime)
+        nextRemote += 1
+
+      log.metric_access(dbFile.metric_path)
+      if dbFile in remoteFetches:
+        dbResults = remoteFetches.pop(dbFile).get_results()
+      else:
+        dbResults = dbFile.fetch(fromTime, untilTime)
+      try:
+        cachedResults = CarbonLink.query(dbFile.real_metric)
+        results = mergeResults(dbResults, cachedResults)
+      except:
+        log.exception()
+        results = dbResults
+
+      if not results:
+        continue
+
+      (timeInfo,values) = results
+      (start,end,step) = timeInfo
+      series = TimeSeries(dbFile.metric_path, start, end, step, values)
+      series.pathExpression = pathExpr #hack to pass expressions through to render functions
+      seriesList.append(series)
+
+  finally:
+    for request in remoteFetches.values():
+      request.close()
 
   return seriesList
 
@@ -251,15 +277,14 @@ def mergeResults(dbResults, cacheResults):
 
   (timeInfo,values) = dbResults
   (start,end,step) = timeInfo
+  numValues = len(values)
 
   for (timestamp, value) in cacheResults:
     interval = timestamp - (timestamp % step)
+    i = int(interval - start) / step
 
-    try:
-      i = int(interval - start) / step
+    if 0 <= i < numValues:
       values[i] = value
-    except:
-      pass
 
   return (timeInfo,values)
 
@@ -10,9 +10,15 @@ settings.configure(
     DATA_DIRS='.',
     CLUSTER_SERVERS='',
     CARBONLINK_HOSTS='',
-    CARBONLINK_TIMEOUT=0)
+    CARBONLINK_TIMEOUT=0,
+    REMOTE_STORE_FETCH_TIMEOUT=0,
+    REMOTE_STORE_MAX_CONCURRENT_FETCHES=2,
+    REMOTE_STORE_RETRY_DELAY=0)
 
-from graphite.render.datalib import TimeSeries
+from datetime import datetime
+from graphite.remote_storage import RemoteNode
+import graphite.render.datalib as datalib
+from graphite.render.datalib import TimeSeries, mergeResults
 import graphite.render.functions as functions
 
 
@@ -90,5 +96,103 @@ class FunctionsTest(unittest.TestCase):
         TestNPercentile(95, [ [50], [95], [190], [285], [94], [189], [284], [284] ])
 
 
+
+class MergeResultsTest(unittest.TestCase):
+
+    def testCachedPointsOutsideWindowAreIgnored(self):
+        timeInfo = (100, 160, 10)
+        dbResults = (timeInfo, [None, None, None, None, None, 5.0])
+        cachedResults = [
+          (95, 1.0),  # before start, used to overwrite the last value
+          (170, 2.0), # past the end
+          (125, 3.0), # within the window
+        ]
+        self.assertEquals((timeInfo, [None, None, 3.0, None, None, 5.0]),
+                          mergeResults(dbResults, cachedResults))
+
+    def testNoCachedPoints(self):
+        dbResults = ((100, 160, 10), [1.0, 2.0, None, None, None, None])
+        self.assertEquals(dbResults, mergeResults(dbResults, []))
+
+
+
+class FakeStore:
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.inFlight = 0
+        self.maxInFlight = 0
+
+    def find(self, pathExpr):
+        return iter(self.nodes)
+
+
+class FakeLocalNode:
+    def __init__(self, metric_path):
+        self.metric_path = self.real_metric = metric_path
+
+    def fetch(self, startTime, endTime):
+        return ((0, 10, 10), [self.metric_path])
+
+
+class FakeFetchRequest:
+    def __init__(self, node):
+        self.node = node
+        self.closed = False
+
+    def get_results(self):
+        self.node.store.inFlight -= 1
+        self.closed = True
+        return ((0, 10, 10), [self.node.metric_path])
+
+    def close(self):
+        self.closed = True
+
+
+class FakeRemoteNode(RemoteNode):
+    def send_fetch(self, startTime, endTime):
+        self.store.inFlight += 1
+        self.store.maxInFlight = max(self.store.maxInFlight, self.store.inFlight)
+        self.request = FakeFetchRequest(self)
+        return self.request
+
+
+class FetchDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.originalStore = datalib.STORE
+        self.originalQuery = datalib.CarbonLink.query
+        datalib.CarbonLink.query = lambda metric: []
+
+    def tearDown(self):
+        datalib.STORE = self.originalStore
+        datalib.CarbonLink.query = self.originalQuery
+
+    def testRemoteAndLocalNodesKeepOrder(self):
+        store = FakeStore([])
+        names = ['local.a', 'remote.b', 'remote.c', 'local.d',
+                 'remote.e', 'remote.f', 'remote.g', 'local.h']
+        for name in names:
+            if name.startswith('remote'):
+                store.nodes.append( FakeRemoteNode(store, name, True) )
+            else:
+                store.nodes.append( FakeLocalNode(name) )
+        datalib.STORE = store
+
+        requestContext = {
+          'startTime' : datetime(2012, 1, 1, 0, 0),
+          'endTime' : datetime(2012, 1, 1, 1, 0),
+          'localOnly' : False,
+        }
+        seriesList = datalib.fetchData(requestContext, 'foo.*')
+
+        self.assertEquals(names, [series.name for series in seriesList])
+        self.assertEquals(names, [series[0] for series in seriesList])
+        self.assertEquals(2, store.maxInFlight)
+        self.assertEquals(0, store.inFlight)
+        for node in store.nodes:
+            if isinstance(node, RemoteNode):
+                self.assertTrue(node.request.closed)
+
+
 if __name__ == '__main__':
     unittest.main()
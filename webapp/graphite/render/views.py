@@ -27,6 +27,7 @@ except ImportError:
 
 from graphite.util import getProfileByUsername, json
 from graphite.remote_storage import HTTPConnectionWithTimeout
+from graphite.storage import stat_cached
 from graphite.logger import log
 from graphite.render.evaluator import evaluateTarget
 from graphite.render.attime import parseATTime
@@ -41,6 +42,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
 
 
+@stat_cached
 def renderView(request):
   start = time()
   (graphOptions, requestOptions) = parseOptions(request)
@@ -60,6 +60,7 @@ LOG_CACHE_PERFORMANCE = False
 
 # Remote store settings
 REMOTE_STORE_FETCH_TIMEOUT = 6
+REMOTE_STORE_MAX_CONCURRENT_FETCHES = 10 #remote fetches a single render keeps in flight at once
 REMOTE_STORE_FIND_TIMEOUT = 2.5
 REMOTE_STORE_RETRY_DELAY = 60
 REMOTE_FIND_CACHE_DURATION = 300
@@ -1,5 +1,6 @@
-import os, time, fnmatch, socket, errno
+import os, time, struct, fnmatch, socket, errno, threading
 from os.path import isdir, isfile, join, exists, splitext, basename, realpath
+from operator import itemgetter
 import whisper
 from graphite.remote_storage import RemoteStore
 from django.conf import settings
@@ -21,6 +22,10 @@ except ImportError:
 
 
 DATASOURCE_DELIMETER = '::RRD_DATASOURCE::'
+GZIP_READ_BUFFER_SIZE = 256 * 1024
+METADATA_CACHE_SIZE = 4096 # entries per file metadata cache before it is reset
+
+_request_state = threading.local()
 
 
 
@@ -91,6 +96,31 @@ class Store:
           found.add(match.metric_path)
 
 
+def stat(path):
+  "os.stat() that reuses earlier results within a stat_cached() call"
+  stat_cache = getattr(_request_state, 'stat_cache', None)
+  if stat_cache is None:
+    return os.stat(path)
+
+  result = stat_cache.get(path)
+  if result is None:
+    result = stat_cache[path] = os.stat(path)
+  return result
+
+
+def stat_cached(func):
+  "Decorator that caches os.stat() results per path for the duration of each call"
+  def wrapper(*args, **kwargs):
+    _request_state.stat_cache = {}
+    try:
+      return func(*args, **kwargs)
+    finally:
+      _request_state.stat_cache = None
+  wrapper.__name__ = func.__name__
+  wrapper.__doc__ = func.__doc__
+  return wrapper
+
+
 def is_local_interface(host):
   if ':' in host:
     host = host.split(':',1)[0]
@@ -281,8 +311,8 @@ class WhisperFile(Leaf):
     Leaf.__init__(self, *args, **kwargs)
     real_fs_path = realpath(self.fs_path)
 
-    start = time.time() - whisper.info(self.fs_path)['maxRetention']
-    end = max( os.stat(self.fs_path).st_mtime, start )
+    start = time.time() - self.getMaxRetention()
+    end = max( stat(self.fs_path).st_mtime, start )
     self.intervals = [ (start, end) ]
 
     if real_fs_path != self.fs_path:
@@ -291,6 +321,9 @@ class WhisperFile(Leaf):
       relative_real_fs_path = real_fs_path[ len(base_fs_path): ]
       self.real_metric = relative_real_fs_path[ :-len(self.extension) ].replace('/', '.')
 
+  def getMaxRetention(self):
+    return whisper.info(self.fs_path)['maxRetention']
+
   def fetch(self, startTime, endTime):
     (timeInfo,values) = whisper.fetch(self.fs_path, startTime, endTime)
     return (timeInfo,values)
@@ -323,27 +356,69 @@ class WhisperFile(Leaf):
 
 class GzippedWhisperFile(WhisperFile):
   extension = '.wsp.gz'
+  header_cache = {} # { fs_path : (mtime, maxRetention) }
 
-  def fetch(self, startTime, endTime):
+  def getMaxRetention(self):
+    mtime = stat(self.fs_path).st_mtime
+    cached = self.header_cache.get(self.fs_path)
+    if cached and cached[0] == mtime:
+      return cached[1]
+
+    (raw, fh) = self.open()
+    try:
+      packedMetadata = fh.read(whisper.metadataSize)
+    finally:
+      fh.close()
+      raw.close()
+
+    maxRetention = struct.unpack(whisper.metadataFormat, packedMetadata)[1]
+    if len(self.header_cache) >= METADATA_CACHE_SIZE:
+      self.header_cache.clear()
+    self.header_cache[self.fs_path] = (mtime, maxRetention)
+    return maxRetention
+
+  def open(self):
+    "Returns the underlying buffered file and a GzipFile reading from it"
     if not gzip:
       raise Exception("gzip module not available, GzippedWhisperFile not supported")
 
-    fh = gzip.GzipFile(self.fs_path, 'rb')
+    # GzipFile pulls small chunks from its fileobj, a large buffer turns
+    # those into far fewer read() syscalls
+    raw = open(self.fs_path, 'rb', GZIP_READ_BUFFER_SIZE)
+    return (raw, gzip.GzipFile(fileobj=raw, mode='rb'))
+
+  def fetch(self, startTime, endTime):
+    (raw, fh) = self.open()
     try:
       return whisper.file_fetch(fh, startTime, endTime)
     finally:
       fh.close()
+      raw.close()
 
 
 class RRDFile(Branch):
+  datasource_cache = {} # { fs_path : (mtime, [datasource_name]) }
+
   def getDataSources(self):
+    return [ RRDDataSource(self, ds) for ds in self.getDataSourceNames() ]
+
+  def getDataSourceNames(self):
+    mtime = stat(self.fs_path).st_mtime
+    cached = self.datasource_cache.get(self.fs_path)
+    if cached and cached[0] == mtime:
+      return cached[1]
+
     info = rrdtool.info(self.fs_path)
     if 'ds' in info:
-      return [RRDDataSource(self, datasource_name) for datasource_name in info['ds']]
+      datasources = list(info['ds'])
     else:
       ds_keys = [ key for key in info if key.startswith('ds[') ]
-      datasources = set( key[3:].split(']')[0] for key in ds_keys )
-      return [ RRDDataSource(self, ds) for ds in datasources ]
+      datasources = list( set( key[3:].split(']')[0] for key in ds_keys ) )
+
+    if len(self.datasource_cache) >= METADATA_CACHE_SIZE:
+      self.datasource_cache.clear()
+    self.datasource_cache[self.fs_path] = (mtime, datasources)
+    return datasources
 
 
 class RRDDataSource(Leaf):
@@ -355,13 +430,14 @@ class RRDDataSource(Leaf):
     self.real_metric = self.metric_path
 
   def fetch(self, startTime, endTime):
-    startString = time.strftime("%H:%M_%Y%m%d", time.localtime(startTime))
-    endString = time.strftime("%H:%M_%Y%m%d", time.localtime(endTime))
+    # rrdtool accepts plain epoch seconds as a time specification
+    startString = str( int(startTime) )
+    endString = str( int(endTime) )
 
     (timeInfo,columns,rows) = rrdtool.fetch(self.fs_path,'AVERAGE','-s' + startString,'-e' + endString)
     colIndex = list(columns).index(self.name)
     rows.pop() #chop off the latest value because RRD returns crazy last values sometimes
-    values = (row[colIndex] for row in rows)
+    values = map(itemgetter(colIndex), rows)
 
     return (timeInfo,values)
 